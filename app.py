@@ -3,13 +3,24 @@ PhishSense AI - Main Flask Application
 Web interface for phishing message detection
 """
 
-from flask import Flask, render_template, request, jsonify
-from phishing_detector import detect_phishing, get_example_messages
+from flask import Flask, Response, render_template, request, jsonify
+from phishing_detector import detect_phishing, detect_phishing_batch, get_example_messages
 import json
+import os
 
 # Initialize Flask application
 app = Flask(__name__)
 
+# Upper bound on messages per /api/analyze_batch request
+MAX_BATCH_SIZE = 100
+
+# Health payload never changes, so it is serialized once at import
+_HEALTH_BODY = json.dumps({
+    'status': 'healthy',
+    'service': 'PhishSense AI',
+    'version': '1.0.0'
+}).encode()
+
 @app.route('/', methods=['GET', 'POST'])
 def home():
     """
@@ -23,8 +34,8 @@ def home():
         # Get message from form
         message = request.form.get('message', '')
         
-        # Detect phishing
-        result = detect_phishing(message)
+        # Detect phishing (verbose: the page lists per-URL details)
+        result = detect_phishing(message, verbose=True)
     
     # Render template with results
     return render_template(
@@ -37,7 +48,8 @@ def home():
 def api_analyze():
     """
     API endpoint for programmatic access
-    Accepts JSON: {"message": "text to analyze"}
+    Accepts JSON: {"message": "text to analyze", "verbose": false}
+    Set "verbose" to JSON true to include per-URL details in features.url_details
     Returns: JSON analysis
     """
     try:
@@ -50,7 +62,7 @@ def api_analyze():
             }), 400
         
         message = data['message']
-        result = detect_phishing(message)
+        result = detect_phishing(message, verbose=data.get('verbose') is True)
         
         return jsonify(result)
     
@@ -60,16 +72,45 @@ def api_analyze():
             'details': str(e)
         }), 500
 
+@app.route('/api/analyze_batch', methods=['POST'])
+def api_analyze_batch():
+    """
+    Batch API endpoint for analyzing several messages in one request
+    Accepts JSON: {"messages": ["text 1", "text 2", ...]} (up to MAX_BATCH_SIZE)
+    Returns: JSON {"results": [analysis, ...]} in input order
+    """
+    try:
+        data = request.get_json(silent=True)
+        messages = data.get('messages') if isinstance(data, dict) else None
+        
+        if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+            return jsonify({
+                'error': 'Please provide a list of text messages in JSON format',
+                'example': {'messages': ['First text', 'Second text']}
+            }), 400
+        
+        if len(messages) > MAX_BATCH_SIZE:
+            return jsonify({
+                'error': f'Please provide at most {MAX_BATCH_SIZE} messages per request',
+                'example': {'messages': ['First text', 'Second text']}
+            }), 400
+        
+        results = detect_phishing_batch(messages)
+        
+        return jsonify({'results': results})
+    
+    except Exception as e:
+        return jsonify({
+            'error': 'Internal server error',
+            'details': str(e)
+        }), 500
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """
     Health check endpoint for monitoring
     """
-    return jsonify({
-        'status': 'healthy',
-        'service': 'PhishSense AI',
-        'version': '1.0.0'
-    })
+    return Response(_HEALTH_BODY, mimetype='application/json')
 
 if __name__ == '__main__':
     # Run the application
@@ -79,10 +120,10 @@ if __name__ == '__main__':
     print("🌐 Network: http://your-ip:5000")
     print("=" * 50)
     
-    # Start Flask server
+    # Start Flask development server (use wsgi.py with gunicorn in production)
     app.run(
         host='0.0.0.0',  # Accessible from network
         port=5000,
-        debug=True,       # Auto-reload on changes
+        debug=os.environ.get('FLASK_DEBUG') == '1',  # Auto-reload only when opted in
         threaded=True     # Handle multiple requests
     )
\ No newline at end of file
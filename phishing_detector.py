@@ -3,10 +3,45 @@ PhishSense AI Pro – Advanced Phishing Detection System
 Enhanced rule-based NLP with ML-inspired features and better accuracy
 """
 
+import json
 import re
+import socket
 import string
+from math import exp
 from urllib.parse import urlparse, unquote
 from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+
+# Patterns used on every request are compiled once at import time
+_WS_RE = re.compile(r'\s+')
+_PUNCT_RE = re.compile(r'([!?.]){2,}')
+_URL_RE = re.compile(r'(https?://\S+|www\.\S+|bit\.ly/\S+|tinyurl\.com/\S+|goo\.gl/\S+)')
+_URGENCY_RE = re.compile('|'.join([
+    r"within \d+ hours?",
+    r"within \d+ days?",
+    r"immediate action",
+    r"act now",
+    r"don't delay",
+    r"limited time",
+    r"expires soon",
+    r"last chance"
+]))
+_GREETING_RE = re.compile(r'hi|hello|dear|greetings|good morning|good afternoon')
+_GENERIC_GREETING_RE = re.compile(r'dear customer|dear user|dear account holder|valued customer')
+
+_PUNCTUATION = frozenset(string.punctuation)
+
+# Every _URL_RE match contains one of these; a plain substring check rules
+# out URL-free messages without running the regex
+_URL_MARKERS = ('http://', 'https://', 'www.', 'bit.ly/', 'tinyurl.com/', 'goo.gl/')
+_LOGIN_PATH_KEYWORDS = ('login', 'signin', 'verify', 'secure')
+
+# Ratio features are sigmoid-scaled before weighting
+_RATIO_FEATURES = frozenset({"all_caps_ratio", "digit_ratio", "special_char_ratio"})
+
+# Keyword categories, in the index order used by FeatureExtractor._all_kw
+_KEYWORD_CATEGORIES = ("threat", "auth", "financial", "impersonation")
 
 # -----------------------------
 # 1. Enhanced Text Preprocessing
@@ -20,28 +55,37 @@ def preprocess_text(text: str) -> str:
     text = text.lower().strip()
     
     # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text)
+    text = _WS_RE.sub(' ', text)
     
     # Decode URL-encoded characters
     text = unquote(text)
     
     # Remove excessive punctuation (keep first of consecutive punctuation)
-    text = re.sub(r'([!?.]){2,}', r'\1', text)
+    text = _PUNCT_RE.sub(r'\1', text)
     
     return text
 
 def extract_urls(text: str) -> list:
     """Extract and normalize URLs from text"""
-    url_pattern = r'(https?://\S+|www\.\S+|bit\.ly/\S+|tinyurl\.com/\S+|goo\.gl/\S+)'
-    urls = re.findall(url_pattern, text)
+    urls = _URL_RE.findall(text)
     return [url.strip('.,;:()[]{}"\'') for url in urls]
 
+def get_timestamp() -> str:
+    """Get current timestamp as an ISO 8601 string (whole seconds)"""
+    return datetime.now().isoformat(timespec='seconds')
+
 # -----------------------------
 # 2. Enhanced Feature Extraction
 # -----------------------------
 class FeatureExtractor:
     """Advanced feature extraction for phishing detection"""
     
+    __slots__ = (
+        'threat_keywords', 'auth_keywords', 'financial_keywords', 'impersonation_keywords',
+        '_all_kw', 'url_shorteners', 'suspicious_tlds',
+        '_urgency_re', '_greeting_re', '_generic_re'
+    )
+    
     def __init__(self):
         # Expanded keyword categories with weights
         self.threat_keywords = {
@@ -76,6 +120,14 @@ class FeatureExtractor:
             "support": 1.3, "customer": 1.3, "service": 1.3, "team": 1.2
         }
         
+        # Unified lookup: word -> ((category index, weight), ...); a word may
+        # belong to several categories (e.g. "verify", "paypal")
+        self._all_kw = {}
+        for idx, keywords in enumerate((self.threat_keywords, self.auth_keywords,
+                                        self.financial_keywords, self.impersonation_keywords)):
+            for word, weight in keywords.items():
+                self._all_kw[word] = self._all_kw.get(word, ()) + ((idx, weight),)
+        
         # Suspicious URL shorteners
         self.url_shorteners = {
             "bit.ly", "tinyurl.com", "goo.gl", "ow.ly", "is.gd",
@@ -86,56 +138,75 @@ class FeatureExtractor:
         
         # Suspicious TLDs
         self.suspicious_tlds = {'.xyz', '.top', '.club', '.work', '.site', '.online', '.click', '.link'}
+        
+        # Context patterns, each a single alternation so the text is scanned once
+        self._urgency_re = _URGENCY_RE
+        self._greeting_re = _GREETING_RE
+        self._generic_re = _GENERIC_GREETING_RE
     
-    def extract_features(self, text: str) -> dict:
-        """Extract comprehensive phishing features"""
-        tokens = set(text.split())
+    def extract_features(self, text: str, verbose: bool = False) -> dict:
+        """Extract comprehensive phishing features (per-URL details if verbose)"""
+        # Unique tokens in order of first appearance
+        tokens = dict.fromkeys(text.split())
         features = {}
         
-        # Keyword-based features with weighted counts
-        features["threat_score"] = sum(
-            self.threat_keywords[word] 
-            for word in tokens & self.threat_keywords.keys()
-        )
-        features["auth_score"] = sum(
-            self.auth_keywords[word]
-            for word in tokens & self.auth_keywords.keys()
-        )
-        features["financial_score"] = sum(
-            self.financial_keywords[word]
-            for word in tokens & self.financial_keywords.keys()
-        )
-        features["impersonation_score"] = sum(
-            self.impersonation_keywords[word]
-            for word in tokens & self.impersonation_keywords.keys()
-        )
+        # Keyword-based features with weighted counts, in one pass over the tokens
+        scores = [0] * len(_KEYWORD_CATEGORIES)
+        detected = tuple([] for _ in _KEYWORD_CATEGORIES)
+        for token in tokens:
+            for idx, weight in self._all_kw.get(token, ()):
+                scores[idx] += weight
+                detected[idx].append(token)
+        for category, score in zip(_KEYWORD_CATEGORIES, scores):
+            features[f"{category}_score"] = score
+        
+        # Consumed (popped) by PhishingDetector._extract_detected_keywords
+        features["_detected"] = {
+            f"{category}_keywords": words
+            for category, words in zip(_KEYWORD_CATEGORIES, detected)
+        }
         
-        # URL analysis
-        urls = extract_urls(text)
+        # URL analysis (skipped entirely for messages without URL markers)
+        urls = extract_urls(text) if any(m in text for m in _URL_MARKERS) else []
         features["total_urls"] = len(urls)
         features["suspicious_urls"] = 0
         features["suspicious_domains"] = 0
         features["ip_address_urls"] = 0
         
-        url_features = []
         for url in urls:
-            url_feat = self._analyze_url(url)
-            url_features.append(url_feat)
+            is_shortener, has_suspicious_tld, is_ip_address, _ = self._score_url(url)
             
-            if url_feat["is_shortener"]:
+            if is_shortener:
                 features["suspicious_urls"] += 1
-            if url_feat["has_suspicious_tld"]:
+            if has_suspicious_tld:
                 features["suspicious_domains"] += 1
-            if url_feat["is_ip_address"]:
+            if is_ip_address:
                 features["ip_address_urls"] += 1
         
-        features["url_details"] = url_features
+        # Per-URL details are only built for callers that display them
+        if verbose:
+            features["url_details"] = [self._analyze_url(url) for url in urls]
         
         # Text-based features
-        features["exclamation_count"] = text.count('!')
-        features["all_caps_ratio"] = self._calculate_caps_ratio(text)
-        features["digit_ratio"] = sum(c.isdigit() for c in text) / max(1, len(text))
-        features["special_char_ratio"] = sum(c in string.punctuation for c in text) / max(1, len(text))
+        # One pass over the text; the per-character checks below only run
+        # over the distinct characters
+        char_counts = Counter(text)
+        letters = uppers = digits = puncts = 0
+        for char, count in char_counts.items():
+            if char.isalpha():
+                letters += count
+                if char.isupper():
+                    uppers += count
+            elif char.isdigit():
+                digits += count
+            elif char in _PUNCTUATION:
+                puncts += count
+        
+        n = len(text) or 1
+        features["exclamation_count"] = char_counts['!']
+        features["all_caps_ratio"] = uppers / letters if letters else 0
+        features["digit_ratio"] = digits / n
+        features["special_char_ratio"] = puncts / n
         
         # Context features
         features["greeting_missing"] = self._check_greeting(text)
@@ -144,60 +215,73 @@ class FeatureExtractor:
         
         return features
     
+    def _score_url(self, url: str) -> tuple:
+        """Score a URL as (is_shortener, has_suspicious_tld, is_ip_address, has_login_keywords)"""
+        try:
+            parsed = urlparse(url if url.startswith('http') else f'http://{url}')
+            # Hostname without port/userinfo or trailing root dot, for exact domain lookups
+            host = (parsed.hostname or '').rstrip('.')
+        except ValueError:
+            return (False, False, False, False)
+        path = parsed.path.lower()
+        
+        return (
+            self._is_shortener(host),
+            '.' + host.rsplit('.', 1)[-1] in self.suspicious_tlds,
+            self._is_ip_address(host),
+            any(keyword in path for keyword in _LOGIN_PATH_KEYWORDS)
+        )
+    
     def _analyze_url(self, url: str) -> dict:
-        """Analyze individual URL for suspicious characteristics"""
+        """Describe an individual URL for verbose reports"""
         try:
             parsed = urlparse(url if url.startswith('http') else f'http://{url}')
-            domain = parsed.netloc.lower()
-            path = parsed.path.lower()
-            
-            return {
-                "original": url,
-                "domain": domain,
-                "path": path,
-                "is_shortener": any(short in domain for short in self.url_shorteners),
-                "has_suspicious_tld": any(domain.endswith(tld) for tld in self.suspicious_tlds),
-                "is_ip_address": bool(re.match(r'\d+\.\d+\.\d+\.\d+', domain)),
-                "has_login_keywords": any(keyword in path for keyword in ['login', 'signin', 'verify', 'secure']),
-                "length": len(url)
-            }
-        except:
+        except ValueError:
             return {"original": url, "error": "parse_failed"}
+        is_shortener, has_suspicious_tld, is_ip_address, has_login_keywords = self._score_url(url)
+        
+        return {
+            "original": url,
+            "domain": parsed.netloc.lower(),
+            "path": parsed.path.lower(),
+            "is_shortener": is_shortener,
+            "has_suspicious_tld": has_suspicious_tld,
+            "is_ip_address": is_ip_address,
+            "has_login_keywords": has_login_keywords,
+            "length": len(url)
+        }
     
-    def _calculate_caps_ratio(self, text: str) -> float:
-        """Calculate ratio of uppercase letters"""
-        if not text:
-            return 0
-        letters = [c for c in text if c.isalpha()]
-        if not letters:
-            return 0
-        return sum(1 for c in letters if c.isupper()) / len(letters)
+    def _is_ip_address(self, host: str) -> bool:
+        """Check whether the host is a literal IPv4 address"""
+        # Unquoted %00 can embed a NUL, which inet_aton rejects; judge the part before it
+        host = host.partition('\x00')[0]
+        try:
+            socket.inet_aton(host)
+        except (OSError, ValueError):
+            return False
+        return True
+    
+    def _is_shortener(self, host: str) -> bool:
+        """Check the host and each parent domain against known shorteners"""
+        while host:
+            if host in self.url_shorteners:
+                return True
+            host = host.partition('.')[2]
+        return False
     
     def _check_greeting(self, text: str) -> int:
         """Check if greeting is missing"""
-        greetings = {"hi", "hello", "dear", "greetings", "good morning", "good afternoon"}
-        first_50 = text[:50].lower()
-        return 0 if any(greet in first_50 for greet in greetings) else 1
+        # Text is already lowercased by preprocess_text; only the first 50 chars count
+        return 0 if self._greeting_re.search(text, 0, 50) else 1
     
     def _check_urgency_indicators(self, text: str) -> int:
         """Check for urgency indicators"""
-        urgency_patterns = [
-            r"within \d+ hours?",
-            r"within \d+ days?",
-            r"immediate action",
-            r"act now",
-            r"don't delay",
-            r"limited time",
-            r"expires soon",
-            r"last chance"
-        ]
-        return 1 if any(re.search(pattern, text) for pattern in urgency_patterns) else 0
+        return 1 if self._urgency_re.search(text) else 0
     
     def _check_generic_greeting(self, text: str) -> int:
         """Check for generic greetings"""
-        generic_greetings = ["dear customer", "dear user", "dear account holder", "valued customer"]
-        first_100 = text[:100].lower()
-        return 1 if any(greet in first_100 for greet in generic_greetings) else 0
+        # Text is already lowercased by preprocess_text; only the first 100 chars count
+        return 1 if self._generic_re.search(text, 0, 100) else 0
 
 # -----------------------------
 # 3. Advanced Risk Calculation
@@ -205,6 +289,8 @@ class FeatureExtractor:
 class RiskCalculator:
     """Machine learning-inspired risk scoring"""
     
+    __slots__ = ('weights', 'thresholds', '_feature_order')
+    
     def __init__(self):
         self.weights = {
             # Keyword-based weights
@@ -236,20 +322,28 @@ class RiskCalculator:
             "medium_risk": 5.0,
             "low_risk": 3.0
         }
+        
+        # Fixed (feature, weight, is_ratio) scoring order, resolved once
+        self._feature_order = tuple(
+            (feature, weight, feature in _RATIO_FEATURES)
+            for feature, weight in self.weights.items()
+        )
     
     def calculate_score(self, features: dict) -> float:
         """Calculate comprehensive risk score"""
         base_score = 0
         
         # Apply weighted feature scoring
-        for feature, value in features.items():
-            if feature in self.weights and isinstance(value, (int, float)):
-                if feature in ["all_caps_ratio", "digit_ratio", "special_char_ratio"]:
-                    # Apply sigmoid-like scaling for ratios
-                    scaled_value = 10 * (1 / (1 + 2.718 ** (-10 * (value - 0.3))))
-                    base_score += scaled_value * self.weights[feature]
-                else:
-                    base_score += value * self.weights[feature]
+        for feature, weight, is_ratio in self._feature_order:
+            value = features.get(feature)
+            if not isinstance(value, (int, float)):
+                continue
+            if is_ratio:
+                # Apply sigmoid-like scaling for ratios
+                scaled_value = 10 / (1 + exp(-10 * (value - 0.3)))
+                base_score += scaled_value * weight
+            else:
+                base_score += value * weight
         
         # Apply non-linear scaling
         risk_score = min(10.0, round(self._logistic_scale(base_score), 1))
@@ -268,7 +362,7 @@ class RiskCalculator:
     
     def _logistic_scale(self, x: float) -> float:
         """Apply logistic scaling to smooth score distribution"""
-        return 10 / (1 + 2.718 ** (-0.5 * (x - 5)))
+        return 10 / (1 + exp(-0.5 * (x - 5)))
 
 # -----------------------------
 # 4. Enhanced Classification
@@ -276,18 +370,20 @@ class RiskCalculator:
 class PhishingDetector:
     """Main detection class with comprehensive analysis"""
     
+    __slots__ = ('extractor', 'calculator')
+    
     def __init__(self):
         self.extractor = FeatureExtractor()
         self.calculator = RiskCalculator()
     
-    def detect(self, text: str) -> dict:
+    def detect(self, text: str, verbose: bool = False) -> dict:
         """Complete phishing detection analysis"""
         if not text or not text.strip():
             return self._error_response("Please enter a message to analyze")
         
         # Preprocess and extract features
         processed_text = preprocess_text(text)
-        features = self.extractor.extract_features(processed_text)
+        features = self.extractor.extract_features(processed_text, verbose)
         risk_score = self.calculator.calculate_score(features)
         
         # Get detailed classification
@@ -331,7 +427,7 @@ class PhishingDetector:
             severity = "low"
         
         # Extract detected keywords from all categories
-        keywords = self._extract_detected_keywords(processed)
+        keywords = self._extract_detected_keywords(features)
         
         return {
             "original_text": original,
@@ -347,16 +443,10 @@ class PhishingDetector:
             "timestamp": self._get_timestamp()
         }
     
-    def _extract_detected_keywords(self, text: str) -> dict:
+    def _extract_detected_keywords(self, features: dict) -> dict:
         """Extract detected keywords by category"""
-        tokens = set(text.split())
-        
-        return {
-            "threat_keywords": [k for k in self.extractor.threat_keywords if k in tokens],
-            "auth_keywords": [k for k in self.extractor.auth_keywords if k in tokens],
-            "financial_keywords": [k for k in self.extractor.financial_keywords if k in tokens],
-            "impersonation_keywords": [k for k in self.extractor.impersonation_keywords if k in tokens]
-        }
+        # Collected during the keyword pass in FeatureExtractor.extract_features
+        return features.pop("_detected")
     
     def _explain_features(self, features: dict) -> list:
         """Generate human-readable explanations for features"""
@@ -418,8 +508,7 @@ class PhishingDetector:
     
     def _get_timestamp(self):
         """Get current timestamp"""
-        from datetime import datetime
-        return datetime.now().isoformat()
+        return get_timestamp()
     
     def _error_response(self, message: str) -> dict:
         """Generate error response"""
@@ -498,10 +587,39 @@ def run_demo():
 # -----------------------------
 # 6. Quick Detection Function (Simple API)
 # -----------------------------
-def detect_phishing(text: str) -> dict:
+# Shared detector; detect() keeps no per-call state, so it is safe across threads
+_DETECTOR = PhishingDetector()
+
+# Longer messages bypass the result cache: they rarely repeat byte-for-byte and
+# each entry holds the text several times over
+_CACHE_MAX_TEXT_LEN = 4096
+
+@lru_cache(maxsize=4096)
+def _detect_cached(text: str, verbose: bool) -> str:
+    """Analyze a stripped message once and keep the result serialized"""
+    # Cached as JSON so every caller gets a fresh, independently mutable copy
+    return json.dumps(_DETECTOR.detect(text, verbose))
+
+def detect_phishing(text: str, verbose: bool = False) -> dict:
     """Simple wrapper for quick phishing detection"""
-    detector = PhishingDetector()
-    return detector.detect(text)
+    if not isinstance(text, str):
+        return _DETECTOR.detect(text, verbose)
+    
+    stripped = text.strip()
+    if len(stripped) > _CACHE_MAX_TEXT_LEN:
+        return _DETECTOR.detect(text, verbose)
+    
+    # Repeated messages (e.g. one lure sent to many users) hit the cache;
+    # the caller's text and a fresh timestamp are restored on each copy
+    result = json.loads(_detect_cached(stripped, verbose))
+    if "original_text" in result:
+        result["original_text"] = text
+    result["timestamp"] = get_timestamp()
+    return result
+
+def detect_phishing_batch(texts: list) -> list:
+    """Run detection over several messages with the shared detector"""
+    return [detect_phishing(text) for text in texts]
 
 # -----------------------------
 # Main execution
@@ -0,0 +1,10 @@
+"""
+PhishSense AI - WSGI entry point
+Production server entry, e.g.:
+    gunicorn -w $(nproc) -k gthread --threads 4 wsgi:app
+"""
+
+from app import app
+
+if __name__ == '__main__':
+    app.run()